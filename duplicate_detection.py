@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Duplicate Detection Script
+Finds exact and near-duplicate records in the cleaned biomedical data
+
+Steps:
+1. Load the cleaned CSV file
+2. Detect near-duplicate record pairs (rows matching on most columns)
+3. Analyze duplicate patterns per column
+
+Author: Data Processing Pipeline
+Date: 2026-02-10
+"""
+
+import itertools
+import math
+from collections import defaultdict
+
+import pandas as pd
+import numpy as np
+
+
+# Explicit dtypes for CSV reads: skips object inference and keeps strings
+# in Arrow buffers instead of one Python object per cell
+CSV_DTYPES = {
+    'Howoldareyou': 'float32',
+    'Yourbodyweight': 'float32',
+    'Yourheight': 'float32',
+    'MaritalStatus': 'string[pyarrow]',
+    'Areyoumaleorfemale': 'string[pyarrow]',
+    'Whatisyourhighestlevelofeducation': 'string[pyarrow]',
+}
+
+
+def load_data(input_path):
+    """Load the input CSV file"""
+    print(f"Loading data from: {input_path}")
+    df = pd.read_csv(input_path, engine='pyarrow', dtype_backend='pyarrow',
+                     dtype=CSV_DTYPES)
+    print(f"  - Loaded {len(df)} records")
+    return df
+
+
+def detect_similar_records(df, threshold=0.8):
+    """
+    Detect pairs of near-duplicate records
+
+    Two records are considered similar when they have identical values in
+    at least `threshold` (fraction) of the columns.
+
+    Uses a blocking strategy instead of comparing all row pairs:
+    any two rows matching on >= k of n columns must match exactly on at
+    least one k-column subset, so rows are grouped by a hash of each
+    k-column subset and only rows sharing a block are verified pairwise.
+    This is O(C(n,k) * N) hashing instead of O(N^2) row comparisons.
+
+    Args:
+        df: DataFrame to scan
+        threshold: Minimum fraction of matching columns (default 0.8)
+
+    Returns:
+        List of (index_i, index_j, similarity) tuples with similarity >= threshold
+    """
+    print(f"\nDetecting similar records (threshold: {threshold:.0%})...")
+
+    ncols = df.shape[1]
+    nrows = len(df)
+    k = math.ceil(threshold * ncols)
+
+    # Hash each column once in C (shape [ncols, N], uint64): no all-string
+    # copy of the frame and no boxing of numerics into Python strings.
+    # Cell comparisons become uint64 equality on these hashes, so two
+    # missing values in the same column count as a match.
+    col_hashes = np.stack([
+        pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+        for col in df.columns
+    ])
+
+    similar_pairs = []
+    seen_pairs = set()
+
+    for combo in itertools.combinations(range(ncols), k):
+        # Combined hash of the k-column subset, computed in C per column
+        block_key = col_hashes[combo[0]].copy()
+        for c in combo[1:]:
+            block_key ^= col_hashes[c]
+
+        # Rows sharing a block key are duplicate candidates
+        candidates = pd.Series(block_key).duplicated(keep=False)
+        if not candidates.any():
+            continue
+
+        blocks = defaultdict(list)
+        for idx in np.flatnonzero(candidates.to_numpy()):
+            blocks[block_key[idx]].append(idx)
+
+        # Verify candidates pairwise on the full row of column hashes
+        for members in blocks.values():
+            for i, j in itertools.combinations(members, 2):
+                if (i, j) in seen_pairs:
+                    continue
+                seen_pairs.add((i, j))
+                similarity = (col_hashes[:, i] == col_hashes[:, j]).mean()
+                if similarity >= threshold:
+                    similar_pairs.append((i, j, similarity))
+
+    print(f"  - Compared {nrows} records using {k}-of-{ncols} column blocking")
+    print(f"  - Found {len(similar_pairs)} similar record pairs")
+    return similar_pairs
+
+
+def analyze_duplicate_patterns(df):
+    """Analyze which columns contain repeated values"""
+    print("\nAnalyzing duplicate patterns per column...")
+
+    exact_duplicates = df.duplicated(keep=False).sum()
+    print(f"  - Records involved in exact duplicates: {exact_duplicates}")
+
+    # One hashing pass per column instead of two: duplicated values are
+    # the non-null entries beyond the first occurrence of each value
+    unique_counts = df.nunique()
+    missing_counts = df.isna().sum()
+    dup_counts = len(df) - unique_counts - missing_counts
+
+    print(f"  - {'Column':<40} {'Unique':>8} {'Duplicated':>12}")
+    for col in df.columns:
+        print(f"    {col:<40} {unique_counts[col]:>8} {dup_counts[col]:>12}")
+
+    return df
+
+
+def main():
+    """Main duplicate detection pipeline"""
+    print("="*80)
+    print("DUPLICATE DETECTION")
+    print("="*80)
+
+    input_path = '/Users/arriazui/Desktop/master/BIOMEDICAL_DATA_CHALLENGES/2_data_clearance/input_cleaned.csv'
+
+    df = load_data(input_path)
+    similar_pairs = detect_similar_records(df)
+
+    if similar_pairs:
+        print("\nSimilar record pairs:")
+        for i, j, similarity in similar_pairs:
+            print(f"  - Rows {i} and {j}: {similarity:.0%} matching columns")
+
+    analyze_duplicate_patterns(df)
+    print("="*80)
+
+
+if __name__ == "__main__":
+    main()